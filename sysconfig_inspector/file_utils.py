@@ -0,0 +1,70 @@
+import os
+import copy
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+def read_file_bytes(path: str) -> bytes:
+    """
+    Reads a whole file with as few read() syscalls as possible.
+
+    The file is read in one call sized by fstat(). One extra byte is requested,
+    so a file that grew since fstat() is still read to the end.
+
+    Raises:
+        OSError: If the file cannot be opened or read.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        read_size = os.fstat(fd).st_size + 1
+        chunks = [os.read(fd, read_size)]
+        while len(chunks[-1]) == read_size:
+            chunks.append(os.read(fd, read_size))
+    finally:
+        os.close(fd)
+    return b''.join(chunks)
+
+
+class BoundedCache:
+    """
+    Thread-safe least-recently-used cache holding at most max_size entries.
+
+    Values are copied with copy_value when stored and when returned,
+    so callers never share state with the cache or with each other.
+    """
+
+    def __init__(self, max_size: int, copy_value: Callable[[Any], Any] = copy.deepcopy):
+        self.max_size = max_size
+        self._copy_value = copy_value
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Returns a copy of the value cached for key, or None if there is none.
+        A hit marks the entry as most recently used.
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                return None
+            self._entries.move_to_end(key)
+        return self._copy_value(value)
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Stores a copy of value for key, evicting the least recently used entries beyond max_size.
+        """
+        stored_value = self._copy_value(value)
+        with self._lock:
+            self._entries[key] = stored_value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
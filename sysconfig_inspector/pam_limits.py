@@ -1,7 +1,10 @@
 import glob
 import os
+import re
 import logging
-from typing import List, Dict, Any, Union, Optional
+from typing import List, Dict, Any, Union, Optional, Tuple
+
+from sysconfig_inspector.file_utils import BoundedCache, read_file_bytes
 
 logger = logging.getLogger(__name__)
 
@@ -15,12 +18,26 @@ class PamLimits:
 
     DEFAULT_LIMITS_CONF_PATH = '/etc/security/limits.conf'
     DEFAULT_LIMITS_D_PATH = '/etc/security/limits.d/*.conf'
-    EXPECTED_LIMITS_FIELDS = 4 # domain, type, item, value
-
-    def __init__(self, limits_conf_path: Optional[str] = None, limits_d_path: Optional[str] = None):
+    PARSE_CACHE_SIZE = 128
+    # Every non-empty, non-comment line: either exactly four fields
+    # (domain, type, item, value) or the stripped malformed line
+    LIMITS_LINE_PATTERN = re.compile(
+        r'^[^\S\n]*(?:'
+        r'(?P<domain>[^#\s]\S*)[^\S\n]+(?P<type>\S+)[^\S\n]+(?P<item>\S+)[^\S\n]+(?P<value>\S+)[^\S\n]*$'
+        r'|(?P<malformed>[^#\s][^\n]*?)\s*?$)',
+        re.MULTILINE
+    )
+
+    # Parsed entries shared by all instances, keyed by file path and content.
+    # Entries are flat dicts of immutable values, so copying each dict is enough.
+    _parse_cache = BoundedCache(PARSE_CACHE_SIZE, copy_value=lambda entries: [dict(entry) for entry in entries])
+
+    def __init__(self, limits_conf_path: Optional[str] = None, limits_d_path: Optional[str] = None,
+                 compare_against: Optional[List[Dict[str, Any]]] = None):
         """
         Initialize PamLimits instance.
         Discovers and parses the system's PAM limits configuration files.
+        If 'compare_against' is given, the parsed limits are compared to it right away.
         """
         self._limits_conf_path = limits_conf_path if limits_conf_path is not None else self.DEFAULT_LIMITS_CONF_PATH
         self._limits_d_path = limits_d_path if limits_d_path is not None else self.DEFAULT_LIMITS_D_PATH
@@ -33,6 +50,9 @@ class PamLimits:
         self.missing_from_actual: List[Dict[str, Any]] = []
         self.extra_in_actual: List[Dict[str, Any]] = []
 
+        if compare_against is not None:
+            self.compare_to(compare_against)
+
     def compare_to(self, target_limits_data: List[Dict[str, Any]]):
         """
         Compare PAM limits configuration with a provided target configuration.
@@ -63,6 +83,9 @@ class PamLimits:
         """
         Discover all PAM limits configuration files on the system.
 
+        limits.d files are returned in lexical order, the order PAM applies them in.
+        An empty limits.d pattern skips the directory scan.
+
         Returns:
             list: List of absolute file paths to the discovered configuration files.
         """
@@ -70,93 +93,101 @@ class PamLimits:
         if os.path.isfile(self._limits_conf_path):
             found_files.append(self._limits_conf_path)
             
-        found_files.extend(glob.glob(self._limits_d_path))
+        if self._limits_d_path:
+            found_files.extend(sorted(glob.iglob(self._limits_d_path)))
         return found_files
 
     def _parse_all_config_files(self) -> List[Dict[str, Any]]:
         """
         Parses all discovered PAM limits configuration files.
 
+        Entries keep the order of 'config_file_paths'.
+
         Returns:
             List[Dict[str, Any]]: List of dictionaries, each representing a parsed limit entry.
         """
         all_parsed_limits: List[Dict[str, Any]] = []
         for file_path in self.config_file_paths:
-            raw_lines = self._read_file_content(file_path)
-            clean_lines = self._cleanse_config_lines(raw_lines)
-            parsed_entries = self._parse_limits_entries(clean_lines, file_path)
-            all_parsed_limits.extend(parsed_entries)
+            all_parsed_limits.extend(self._parse_config_file(file_path))
         return all_parsed_limits
 
-    def _parse_limits_entries(self, sanitized_lines: List[str], filename: str) -> List[Dict[str, Any]]:
+    def _parse_config_file(self, file_path: str) -> List[Dict[str, Any]]:
         """
-        Parses PAM limits entries from a list of sanitized lines.
+        Reads and parses a single PAM limits configuration file.
 
         Args:
-            sanitized_lines (list): List of cleaned strings, each representing
-                                    a PAM limit rule.
-            filename (str): Name of the file from which these lines were read.
+            file_path (str): The absolute path to the file.
 
         Returns:
             List[Dict[str, Any]]: List of dictionaries, each representing a parsed limit entry.
         """
-        parsed_entries: List[Dict[str, Any]] = []
-        for line in sanitized_lines:
-            parts = line.split(None, self.EXPECTED_LIMITS_FIELDS)
-            
-            if len(parts) != self.EXPECTED_LIMITS_FIELDS:
-                logger.warning(f"Line '{line}' in '{filename}' does not match expected format. Skipping.")
-                continue
+        content = self._read_file_content(file_path)
+        cache_key = (file_path, content)
 
-            domain, limit_type, limit_item, raw_value = parts
+        parsed_entries = self._parse_cache.get(cache_key)
+        if parsed_entries is None:
+            parsed_entries, all_lines_valid = self._parse_limits_entries(content, file_path)
 
-            try:
-                value: Union[int, str] = int(raw_value)
-            except ValueError:
-                value = raw_value  
+            # Files with malformed lines are not cached, so their warnings are logged on every parse
+            if all_lines_valid:
+                self._parse_cache.put(cache_key, parsed_entries)
 
-            parsed_entries.append({
-                "file": filename,
-                "domain": domain,
-                "limit_type": limit_type,
-                "limit_item": limit_item,
-                "value": value,
-            })
         return parsed_entries
 
-    def _cleanse_config_lines(self, config_lines: List[str]) -> List[str]:
+    def _parse_limits_entries(self, content: str, filename: str) -> Tuple[List[Dict[str, Any]], bool]:
         """
-        Remove comments and empty lines from a list of raw configuration lines.
+        Parses PAM limits entries from raw file content.
+
+        All lines are matched in a single regex pass. Comments and empty lines are skipped,
+        lines without exactly four fields are logged and skipped.
 
         Args:
-            config_lines (list): List of raw strings read from a configuration file.
+            content (str): Raw content of a configuration file.
+            filename (str): Name of the file from which the content was read.
 
         Returns:
-            list: List of strings without comments and empty lines.
+            Tuple[List[Dict[str, Any]], bool]: List of dictionaries, each representing a parsed limit entry,
+                                               and whether every line was well-formed.
         """
-        clean_lines: List[str] = []
-        for line in config_lines:
-            stripped_line = line.strip()
-            if not stripped_line or stripped_line.startswith("#"):
+        parsed_entries: List[Dict[str, Any]] = []
+        all_lines_valid = True
+        for match in self.LIMITS_LINE_PATTERN.finditer(content):
+            malformed_line = match.group('malformed')
+            if malformed_line is not None:
+                logger.warning("Line '%s' in '%s' does not match expected format. Skipping.", malformed_line, filename)
+                all_lines_valid = False
                 continue
-            clean_lines.append(stripped_line)
-        return clean_lines
 
-    def _read_file_content(self, path: str) -> List[str]:
+            domain, limit_type, limit_item, raw_value = match.group('domain', 'type', 'item', 'value')
+
+            # Classify up front: "unlimited"/"infinity" are common and raising ValueError is slow.
+            # A sign is accepted like int() does; digit separators ("1_000") stay strings, as PAM rejects them.
+            digits = raw_value[1:] if raw_value[0] in '+-' else raw_value
+            value: Union[int, str] = int(raw_value) if digits.isdecimal() else raw_value
+
+            parsed_entries.append({
+                "file": filename,
+                "domain": domain,
+                "limit_type": limit_type,
+                "limit_item": limit_item,
+                "value": value,
+            })
+        return parsed_entries, all_lines_valid
+
+    def _read_file_content(self, path: str) -> str:
         """
-        Reads lines from a config file.
+        Reads the content of a config file.
 
         Args:
             path (str): The absolute path to the file.
 
         Returns:
-            list: A list of strings, where each string is a line from the file.
+            str: The whole content of the file.
             
         Raises:
             IOError: If the file cannot be read.
         """
-        with open(path, 'rt', encoding='utf-8') as f:
-            return f.readlines()
+        return read_file_bytes(path).decode('utf-8')
 
     def _sort_limits_data(self, limits_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
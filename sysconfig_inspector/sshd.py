@@ -1,10 +1,29 @@
+import io
 import os
+import sys
 import glob
 import logging
-from typing import Any, Dict, List, Tuple, Optional
+from typing import Any, Callable, Dict, List, Tuple, Optional, TextIO
+
+from sysconfig_inspector.file_utils import BoundedCache, read_file_bytes
 
 logger = logging.getLogger(__name__)
 
+def _glob_sorted(pattern: str) -> List[str]:
+    """
+    Default Include resolver: files matching pattern, sorted by name.
+    """
+    return sorted(glob.glob(pattern))
+
+
+def _normalize_match_criteria(criteria: str) -> str:
+    """
+    Canonical form of a Match criteria string.
+    Collapses runs of whitespace, so "User  admin" and "User admin" compare equal.
+    """
+    return sys.intern(' '.join(criteria.split()))
+
+
 class SSHDInspector():
     """
     Parses and inspects SSHD (sshd_config) configuration files.
@@ -12,19 +31,47 @@ class SSHDInspector():
 
     # --- CONSTANTS ---
     SSHD_CONFIG_PATH = '/etc/ssh/sshd_config'
+    PARSE_CACHE_SIZE = 128
+    MAX_INCLUDE_DEPTH = 16
+
+    # sshd_config boolean keywords, keyed by lowercase value
+    BOOLEAN_VALUES = {'yes': True, 'no': False}
+
+    # Directives with a dedicated line parser, keyed by lowercase directive name
+    SPECIAL_DIRECTIVE_PARSERS = {
+        'subsystem': '_parse_subsystem_line',
+        'acceptenv': '_parse_acceptenv_line',
+    }
+
+    # Parsed configs shared by all instances, keyed by the raw content
+    _parse_cache = BoundedCache(PARSE_CACHE_SIZE)
 
     def __init__(self, 
-                 sshd_config_path: Optional[str] = None):
+                 sshd_config_path: Optional[str] = None,
+                 sshd_config_stream: Optional[TextIO] = None,
+                 follow_includes: bool = False,
+                 include_resolver: Optional[Callable[[str], List[str]]] = None):
         """
         Initializes the SSHInspector with specified or default configuration paths.
 
         ARGS:
             sshd_config_path (str, optional): sshd_config file
+            sshd_config_stream (TextIO, optional): file-like object with sshd_config content.
+                                                   Read instead of sshd_config_path.
+            follow_includes (bool, optional): Replace Include directives with the content
+                                              of the included files. Otherwise the
+                                              Include directive is kept as a plain value.
+            include_resolver (callable, optional): Expands an absolute Include pattern to the
+                                                   list of files to include, in order.
+                                                   Defaults to a sorted glob.
         """
         self._file_reader = FileConfigReader()
         self._comparator = SSHDConfigComparator()
 
         self._sshd_config_path = sshd_config_path if sshd_config_path is not None else self.SSHD_CONFIG_PATH
+        self._sshd_config_stream = sshd_config_stream
+        self._follow_includes = follow_includes
+        self._include_resolver = include_resolver if include_resolver is not None else _glob_sorted
         self._config_file_paths: List[str] = []
         self._sshd_config: Dict [str, Any] = {}
 
@@ -34,6 +81,14 @@ class SSHDInspector():
         self.missing_from_actual: Dict[str, Any] = {}
         self.extra_in_actual: Dict[str, Any] = {}
 
+    @classmethod
+    def from_text(cls, sshd_config_text: str) -> 'SSHDInspector':
+        """
+        Creates an SSHDInspector from sshd_config content held in a string.
+        No file is read.
+        """
+        return cls(sshd_config_stream=io.StringIO(sshd_config_text))
+
     @property
     def config_file_paths(self) -> List[str]:
         """List of discovered SSH config files"""
@@ -70,6 +125,10 @@ class SSHDInspector():
         """
         found_files: List[str] = []
 
+        if self._sshd_config_stream is not None:
+            self._config_file_paths = found_files
+            return
+
         if os.path.isfile(self._sshd_config_path):
             found_files.append(self._sshd_config_path)
 
@@ -80,9 +139,66 @@ class SSHDInspector():
         Reads, cleanses and parses the main SSHD config file.
         """
 
-        raw_lines = self._file_reader.read_lines(self._sshd_config_path)
-        sanitized_lines = SSHDConfigCleaner.cleanse_lines(raw_lines)
-        self._sshd_config = self._parse_sshd_config_lines(sanitized_lines)
+        if self._sshd_config_stream is not None:
+            raw_lines = self._file_reader.read_stream(self._sshd_config_stream)
+        else:
+            raw_lines = self._file_reader.read_lines(self._sshd_config_path)
+
+        if self._follow_includes:
+            raw_lines = self._expand_includes(raw_lines)
+
+        self._sshd_config = self._parse_cached(raw_lines)
+
+    def _expand_includes(self, raw_lines: List[str], depth: int = 0) -> List[str]:
+        """
+        Replaces Include directives with the lines of the files they match.
+        Included files are added to the discovered config files once, however often they are included.
+        """
+        expanded_lines: List[str] = []
+
+        for line in raw_lines:
+            parts = line.split()
+            if not parts or parts[0].lower() != 'include':
+                expanded_lines.append(line)
+                continue
+
+            if depth >= self.MAX_INCLUDE_DEPTH:
+                logger.error("ERROR: Include nested too deeply, skipping '%s'", line.strip())
+                continue
+
+            for pattern in parts[1:]:
+                for include_path in self._resolve_include_pattern(pattern.strip('"')):
+                    if include_path not in self._config_file_paths:
+                        self._config_file_paths.append(include_path)
+                    included_lines = self._file_reader.read_lines(include_path)
+                    expanded_lines.extend(self._expand_includes(included_lines, depth + 1))
+
+        return expanded_lines
+
+    def _resolve_include_pattern(self, pattern: str) -> List[str]:
+        """
+        Expands an Include pattern to a sorted list of files.
+        Relative patterns are resolved against the sshd_config directory, like sshd does.
+        """
+        if not os.path.isabs(pattern):
+            pattern = os.path.join(os.path.dirname(self._sshd_config_path), pattern)
+        return self._include_resolver(pattern)
+
+    def _parse_cached(self, raw_lines: List[str]) -> Dict[str, Any]:
+        """
+        Parses raw sshd_config lines.
+        Reuses the result of an earlier parse of identical content.
+        The cache stores and returns deep copies, so instances never share parsed state.
+        """
+        cache_key = '\n'.join(raw_lines)
+
+        parsed_config = self._parse_cache.get(cache_key)
+        if parsed_config is None:
+            sanitized_lines = SSHDConfigCleaner.cleanse_lines(raw_lines)
+            parsed_config = self._parse_sshd_config_lines(sanitized_lines)
+            self._parse_cache.put(cache_key, parsed_config)
+
+        return parsed_config
 
 
     # --- PARSING LOGIC ---
@@ -129,7 +245,7 @@ class SSHDInspector():
     def _get_directive_type(self, line: str) -> str:
         """Determines the type of sshd directive based on the first word of the line.
         """
-        first_word = line.lower().split(None, 1)[0] if line.strip() else ''
+        first_word = line.split(None, 1)[0].lower() if line.strip() else ''
         if first_word == 'match':
             return 'match'
         if first_word == 'include':
@@ -139,7 +255,7 @@ class SSHDInspector():
     def _extract_match_criteria(self, line: str) -> str:
         """Extracts the criteria string from a 'Match' line"""
         parts = line.split(None, 1)
-        current_match_criteria = parts[1].strip()
+        current_match_criteria = _normalize_match_criteria(parts[1])
 
         return current_match_criteria
 
@@ -147,10 +263,13 @@ class SSHDInspector():
     def _handle_global_directive(self, line: str, parsed_config: Dict[str, Any]) -> None:
         """
         Parses a sshd config line.
+        The first occurrence of a directive wins, like in sshd.
+        Included lines are spliced in at the position of their Include directive,
+        so setdefault on the expanded line stream resolves Include precedence.
         """
         key, value = self._parse_directive_line(line)
-        if key and key not in parsed_config:
-            parsed_config[key] = value
+        if key:
+            parsed_config.setdefault(sys.intern(key), value)
 
     def _parse_directive_line(self, line: str) -> Tuple[str, Any]:
         """
@@ -159,25 +278,20 @@ class SSHDInspector():
         "22" --> 22
         (yes/no) --> True/False
         """
-        directive = line.lower().split(None, 1)[0]
-        if directive == 'subsystem':
-            return self._parse_subsystem_line(line)
-        if directive == 'acceptenv':
-            return self._parse_acceptenv_line(line)
-
         parts = line.split(None, 1)
+        special_parser = self.SPECIAL_DIRECTIVE_PARSERS.get(parts[0].lower())
+        if special_parser is not None:
+            return getattr(self, special_parser)(line)
+
         if len(parts) == 2:
             key = parts[0].strip()
             value_raw = parts[1].strip().strip('"')
 
-            try:
-                value = int(value_raw)
-            except ValueError:
-                if value_raw.lower() == "yes":
-                    value = True
-                elif value_raw.lower() == "no":
-                    value = False
-                else:
+            value = self.BOOLEAN_VALUES.get(value_raw.lower())
+            if value is None:
+                try:
+                    value = int(value_raw)
+                except ValueError:
                     # keep string: e.g. PermitRootLogin prohibit-password
                     value = value_raw
 
@@ -220,7 +334,7 @@ class SSHDInspector():
         for line in config_lines:
             key, value = self._parse_directive_line(line)
             if key:
-                settings[key] = value
+                settings.setdefault(sys.intern(key), value)
         
         match_block = {
             criteria: settings
@@ -236,14 +350,25 @@ class FileConfigReader:
     def read_lines(self, file_path: str) -> List[str]:
         """
         Reads lines from a given file path.
-        Return an empty list if the file is not found or cannot be read.
+        Reads the whole file at once and decodes it in a single pass.
+        Like sshd, only LF, CRLF and CR end a line.
+        Return an empty list if the file is not found, cannot be read or is not valid UTF-8.
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                return file.readlines()
+            content = read_file_bytes(file_path).decode('utf-8')
         except IOError as e:
-            logger.error(f"ERROR: Could not read file '{file_path}': {e}")
+            logger.error("ERROR: Could not read file '%s': %s", file_path, e)
             return []
+        except UnicodeDecodeError as e:
+            logger.error("ERROR: Could not decode file '%s': %s", file_path, e)
+            return []
+        return content.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+
+    def read_stream(self, stream: TextIO) -> List[str]:
+        """
+        Reads lines from an already opened file-like object.
+        """
+        return stream.readlines()
 
 class SSHDConfigCleaner:
     @staticmethod
@@ -252,8 +377,11 @@ class SSHDConfigCleaner:
         Removes empty lines and comments from a list of raw config lines.
         """
 
-        lines = [line for line in raw_lines if line.strip()]
-        lines = [line for line in lines if not line.strip().startswith("#")]
+        lines = []
+        for line in raw_lines:
+            stripped = line.strip()
+            if stripped and stripped[0] != "#":
+                lines.append(line)
 
         return lines
 
@@ -263,29 +391,9 @@ class SSHDConfigComparator:
         """
         Compare 2 parsed SSHD configuration dictionaries
         """
-        matching_config = {}
-        missing_from_actual = {}
-        extra_in_actual = {}
-
-        for target_key, target_value in target_sshd_config.items():
-            if target_key == "Match": 
-                continue 
-
-            if target_key in actual_config:
-                if actual_config[target_key] == target_value:
-                    matching_config[target_key] = target_value
-                else:
-                    missing_from_actual[target_key] = target_value
-                    extra_in_actual[target_key] = actual_config[target_key]
-            else:
-                missing_from_actual[target_key] = target_value
-
-        for actual_key, actual_value in actual_config.items():
-            if actual_key == "Match": 
-                continue 
-
-            if actual_key not in target_sshd_config:
-                extra_in_actual[actual_key] = actual_value
+        matching_config, missing_from_actual, extra_in_actual = self._compare_settings(
+            actual_config, target_sshd_config, ignored_keys={"Match"}
+        )
 
         actual_matches = actual_config.get("Match", [])
         target_matches = target_sshd_config.get("Match", [])
@@ -307,8 +415,8 @@ class SSHDConfigComparator:
         missing_match_blocks = []
         extra_match_blocks = []
 
-        actual_matches_map = {list(block.keys())[0]: list(block.values())[0] for block in actual_matches}
-        target_matches_map = {list(block.keys())[0]: list(block.values())[0] for block in target_matches}
+        actual_matches_map = self._index_match_blocks(actual_matches)
+        target_matches_map = self._index_match_blocks(target_matches)
 
         all_criteria = set(actual_matches_map.keys()) | set(target_matches_map.keys())
 
@@ -316,25 +424,9 @@ class SSHDConfigComparator:
             actual_settings = actual_matches_map.get(criterium)
             target_settings = target_matches_map.get(criterium)
 
-            current_missing_settings = {}
-            current_extra_settings = {}
-            current_matched_settings = {}
-
-            all_settings_keys = set(actual_settings.keys() if actual_settings else []) | \
-                                    set(target_settings.keys() if target_settings else [])
-
-            for setting_key in all_settings_keys:
-                actual_setting_value = actual_settings.get(setting_key) if actual_settings else None
-                target_setting_value = target_settings.get(setting_key) if target_settings else None
-
-                if actual_setting_value == target_setting_value:
-                    if actual_setting_value is not None:
-                        current_matched_settings[setting_key] = actual_setting_value
-                else:
-                    if target_setting_value is not None:
-                        current_missing_settings[setting_key] = target_setting_value
-                    if actual_setting_value is not None:
-                        current_extra_settings[setting_key] = actual_setting_value
+            current_matched_settings, current_missing_settings, current_extra_settings = self._compare_settings(
+                actual_settings or {}, target_settings or {}
+            )
 
             if current_matched_settings:
                 matched_match_blocks.append({criterium: current_matched_settings})
@@ -347,3 +439,39 @@ class SSHDConfigComparator:
 
         return matched_match_blocks, missing_match_blocks, extra_match_blocks
 
+    @staticmethod
+    def _compare_settings(actual_settings: Dict[str, Any], target_settings: Dict[str, Any],
+                          ignored_keys: frozenset = frozenset()) -> Tuple[Dict, Dict, Dict]:
+        """
+        Splits two flat directive dictionaries into matching, missing and extra directives.
+        Directives with different values are reported as both missing and extra.
+        Used for global directives and for the settings of each Match block.
+        """
+        actual_keys = actual_settings.keys() - ignored_keys
+        target_keys = target_settings.keys() - ignored_keys
+        shared_keys = actual_keys & target_keys
+
+        matching = {
+            key: target_settings[key]
+            for key in shared_keys
+            if actual_settings[key] == target_settings[key]
+        }
+        missing = {key: target_settings[key] for key in target_keys - actual_keys}
+        extra = {key: actual_settings[key] for key in actual_keys - target_keys}
+
+        for key in shared_keys - matching.keys():
+            missing[key] = target_settings[key]
+            extra[key] = actual_settings[key]
+
+        return matching, missing, extra
+
+    @staticmethod
+    def _index_match_blocks(match_blocks: List[Dict]) -> Dict[str, Dict]:
+        """
+        Maps each Match criterium to its settings for O(1) lookup.
+        """
+        return {
+            _normalize_match_criteria(criterium): settings
+            for block in match_blocks
+            for criterium, settings in block.items()
+        }
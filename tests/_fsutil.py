@@ -0,0 +1,33 @@
+import os
+from typing import Optional, Set, Union
+
+# Keep test files in RAM where available
+RAM_TMP_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+
+def write_file(base_dir: str, relative_path: str, contents: Union[str, bytes] = b"",
+               known_dirs: Optional[Set[str]] = None) -> str:
+    """
+    Writes a file below base_dir and returns its full path.
+    relative_path should be like '/etc/security/limits.conf'.
+    Parent directories listed in known_dirs are assumed to exist;
+    newly created ones are added to it.
+    """
+    full_path = os.path.join(base_dir, relative_path.lstrip('/'))
+
+    parent_dir = os.path.dirname(full_path)
+    if known_dirs is None or parent_dir not in known_dirs:
+        os.makedirs(parent_dir, exist_ok=True)
+        if known_dirs is not None:
+            known_dirs.add(parent_dir)
+
+    if isinstance(contents, str):
+        contents = contents.encode('utf-8')
+
+    # Raw fd write, no buffered text wrapper needed for a single write
+    fd = os.open(full_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, contents)
+    finally:
+        os.close(fd)
+    return full_path
@@ -1,65 +1,111 @@
+import io
 import tempfile
+import textwrap
 import os
-import shutil
 import unittest
 import logging
+from typing import Dict, Union
 from sysconfig_inspector.sshd import SSHDInspector
+from tests._fsutil import RAM_TMP_DIR, write_file
 
-logging.basicConfig(level=logging.DEBUG)
+# Set SSHI_TEST_DEBUG=1 to see the inspector's debug output while testing
+if os.environ.get('SSHI_TEST_DEBUG'):
+    logging.basicConfig(level=logging.DEBUG)
 _sshd_inspector_logger = logging.getLogger('sysconfig_inspector.sshd')
 
-print(f"DEBUG_TEST: Effective User ID (euid): {os.geteuid()}")
 
 
 # --- HELPER CLASS FOR TESTING ---
 class BaseSshInspectorTest(unittest.TestCase):
     """
     Base class for SSHD Inspector tests.
-    Provides a temporary filesystem and 
+    Provides a temporary filesystem shared by all tests of a class and 
     helper functions for creating test files.
+    Files created by a test are removed after that test.
     """
-    def setUp(self):
+    @classmethod
+    def setUpClass(cls):
         """
         Sets up a temporary directory for test SSHD config files.
         """
-        self.temp_dir = tempfile.mkdtemp()
-        self._create_base_sshd_config_directories()
+        temp_dir = tempfile.TemporaryDirectory(dir=RAM_TMP_DIR)
+        cls.addClassCleanup(temp_dir.cleanup)
+        cls.temp_dir = temp_dir.name
+        cls._temp_path_prefix = cls.temp_dir.rstrip('/')
+        cls._create_base_sshd_config_directories()
 
-    def tearDown(self):
-        shutil.rmtree(self.temp_dir)
+    def setUp(self):
+        self._created_files = set()
 
-    def _create_base_sshd_config_directories(self):
+    @classmethod
+    def _create_base_sshd_config_directories(cls):
         """
         Creates a temporary directory structure for SSHD tests.
         e.g /tmp/ID/etc/ssh/
+        sshd_config.d is only created once a test writes a file into it.
         """
-        self.sshd_config_path = self._build_temp_path('/etc/ssh/sshd_config')
-        self.included_sshd_dir_path = self._build_temp_path('/etc/ssh/sshd_config.d')
+        cls.sshd_config_path = cls._build_temp_path('/etc/ssh/sshd_config')
+        cls.included_sshd_dir_path = cls._build_temp_path('/etc/ssh/sshd_config.d')
 
-        os.makedirs(os.path.dirname(self.sshd_config_path), exist_ok=True)
-        os.makedirs(self.included_sshd_dir_path, exist_ok=True)
+        sshd_config_dir = os.path.dirname(cls.sshd_config_path)
+        os.makedirs(sshd_config_dir)
 
-    def _build_temp_path(self, relative_path: str) -> str:
+        cls._known_dirs = {sshd_config_dir}
+
+    @classmethod
+    def _build_temp_path(cls, relative_path: str) -> str:
         """
         COnstructs a full, absolute path within the temporary directory.
-        Removes leading slash from relative_path (e.g. /etc/ssh/sshd_config --> etc/ssh/sshd_config)
+        relative_path may start with a slash (e.g. /etc/ssh/sshd_config) or not.
+        """
+        if relative_path.startswith('/'):
+            return cls._temp_path_prefix + relative_path
+        return cls._temp_path_prefix + '/' + relative_path
+
+    @classmethod
+    def _bulk_create(cls, files: Dict[str, str]) -> Dict[str, str]:
+        """
+        Creates several files in the temporary directory in one go.
+        Maps each relative path like '/etc/ssh/sshd_config' to its contents.
+        Returns the full path of every file, keyed by its relative path.
+        The files live until the temporary directory is removed.
         """
-        return os.path.join(self.temp_dir, relative_path.lstrip('/'))
+        return {
+            relative_path: write_file(cls.temp_dir, relative_path, contents, known_dirs=cls._known_dirs)
+            for relative_path, contents in files.items()
+        }
 
-    def create_test_file(self, relative_path: str, contents: str = "") -> str:
+    def create_test_file(self, relative_path: str, contents: Union[str, bytes] = "") -> str:
         """
         Creates a file in the temporary directory.
         Can contain a string.
         Relative_path should be like '/etc/ssh/sshd_config'.
+        The file is removed when the test finishes.
         """
-        full_path = self._build_temp_path(relative_path)
-
-        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        full_path = write_file(self.temp_dir, relative_path, contents, known_dirs=self._known_dirs)
 
-        with open(full_path, 'w', encoding='utf-8') as file:
-            file.write(contents)
+        if full_path not in self._created_files:
+            self._created_files.add(full_path)
+            self.addCleanup(os.remove, full_path)
         return full_path
 
+    def inspect_sshd_config(self, contents: str = "", **inspector_kwargs) -> SSHDInspector:
+        """
+        Writes contents to the temporary sshd_config and returns an SSHDInspector for it.
+        Extra keyword arguments are passed to SSHDInspector.
+        """
+        sshd_config = self.create_test_file('/etc/ssh/sshd_config', contents)
+        return SSHDInspector(sshd_config_path=sshd_config, **inspector_kwargs)
+
+    def assertComparisonEqual(self, sshd_inspector, matching, missing, extra):
+        """
+        Asserts all three comparison results of an inspector at once.
+        """
+        self.assertEqual(
+            (sshd_inspector.matching_config, sshd_inspector.missing_from_actual, sshd_inspector.extra_in_actual),
+            (matching, missing, extra)
+        )
+
 
 # --- BASIC SSHINSPECTOR TESTS ---
 class TestSSHDInspector(BaseSshInspectorTest):
@@ -82,6 +128,29 @@ class TestSSHDInspector(BaseSshInspectorTest):
 
         self.assertEqual(sshd_inspector.config_file_paths, [sshd_config])
 
+    def test_stream_has_no_config_file_paths(self):
+        sshd_inspector = SSHDInspector(
+            sshd_config_stream=io.StringIO("Port 22\n"))
+
+        self.assertEqual(sshd_inspector.config_file_paths, [])
+        self.assertDictEqual(sshd_inspector.sshd_config, {"Port": 22})
+
+    def test_identical_configs_do_not_share_state(self):
+        """
+        The second inspector is served from the parse cache.
+        Changing a Match block setting of the first must not leak into it.
+        """
+        sshd_content = "Port 22\nMatch User admin\nX11Forwarding no\n"
+
+        first_inspector = SSHDInspector.from_text(sshd_content)
+        second_inspector = SSHDInspector.from_text(sshd_content)
+        first_inspector.sshd_config["Match"][0]["User admin"]["X11Forwarding"] = True
+
+        self.assertDictEqual(second_inspector.sshd_config, {
+            "Port": 22,
+            "Match": [{"User admin": {"X11Forwarding": False}}]
+        })
+
 
 # --- TEST FILE SYSTEM OPERATIONS ---
 class TestFileReadOperations(BaseSshInspectorTest):
@@ -104,11 +173,15 @@ class TestFileReadOperations(BaseSshInspectorTest):
         """
         Tests when sshd_config file exists but is unreadable (IOError).
         Expects an empty config and an ERROR log message.
+        Root ignores file permissions, so there a directory stands in for the file.
         """
-        unreadable_file_path = self._build_temp_path(
-            '/etc/ssh/unreadable_sshd_config'
-        )
-        os.makedirs(unreadable_file_path, exist_ok=True)
+        unreadable_file_path = self._build_temp_path('/etc/ssh/unreadable_sshd_config')
+        if os.geteuid() != 0:
+            os.close(os.open(unreadable_file_path, os.O_WRONLY | os.O_CREAT, 0o000))
+            self.addCleanup(os.remove, unreadable_file_path)
+        else:
+            os.mkdir(unreadable_file_path)
+            self.addCleanup(os.rmdir, unreadable_file_path)
 
         with self.assertLogs(_sshd_inspector_logger, level='ERROR') as cm:
             sshd_inspector = SSHDInspector(
@@ -117,59 +190,94 @@ class TestFileReadOperations(BaseSshInspectorTest):
 
             self.assertIn(f"ERROR: Could not read file '{unreadable_file_path}':", cm.output[0])
 
+    def test_sshd_config_invalid_utf8(self):
+        """
+        Invalid UTF-8 is not silently replaced.
+        Expects an empty config and an ERROR log message.
+        """
+        invalid_file_path = self.create_test_file('/etc/ssh/sshd_config', contents=b"Banner \xff\n")
 
+        with self.assertLogs(_sshd_inspector_logger, level='ERROR') as cm:
+            sshd_inspector = SSHDInspector(sshd_config_path=invalid_file_path)
 
+        self.assertIn(f"ERROR: Could not decode file '{invalid_file_path}':", cm.output[0])
+        self.assertDictEqual(sshd_inspector.sshd_config, {})
 
-# --- INTEGRATION TEST WITH WHOLE FILES ---
-class TestIntegrationTest(BaseSshInspectorTest):
-    def test_integration_large_combined_sshd_config(self):
-        """
-        Integration test one big sshd config
+    def test_sshd_config_line_endings(self):
         """
-        sshd_content = """
-            Port 22
-            PermitRootLogin no
-            PubKeyAuthentication no
-            Subsystem sftp /usr/sftp-path
-            X11Forwarding no
-            Match user dummy-user
-            ChrootDirectory /home/user/dummy
-            Match address 8.8.8.8/8,9.9.9.9/8
-            PubKeyAuthentication yes
-            ClientAliveCountMax 3
+        Only LF, CRLF and CR end a line; other Unicode line breaks stay in the value.
         """
         sshd_config = self.create_test_file(
             '/etc/ssh/sshd_config',
-            contents=sshd_content
+            contents="Port 22\rUseDNS no\r\nBanner a\x0cb\u2028c\n"
         )
 
-        expected_output = {
+        sshd_inspector = SSHDInspector(sshd_config_path=sshd_config)
+
+        self.assertDictEqual(sshd_inspector.sshd_config, {
             "Port": 22,
-            "PermitRootLogin": False,
-            "PubKeyAuthentication": False,
-            "Subsystem sftp": "/usr/sftp-path",
-            "X11Forwarding": False,
-            "Match": [
-                {
-                    "user dummy-user": {
-                        "ChrootDirectory": "/home/user/dummy",
-                    }
+            "UseDNS": False,
+            "Banner": "a\x0cb\u2028c",
+        })
 
-                },
-                {
-                    "address 8.8.8.8/8,9.9.9.9/8": {
-                        "PubKeyAuthentication": True,
-                        "ClientAliveCountMax": 3
-                    }
-                }
-            ]
+
+# --- INTEGRATION TEST WITH WHOLE FILES ---
+_LARGE_SSHD_CONTENT = textwrap.dedent("""\
+    Port 22
+    PermitRootLogin no
+    PubKeyAuthentication no
+    Subsystem sftp /usr/sftp-path
+    X11Forwarding no
+    Match user dummy-user
+    ChrootDirectory /home/user/dummy
+    Match address 8.8.8.8/8,9.9.9.9/8
+    PubKeyAuthentication yes
+    ClientAliveCountMax 3
+""")
+
+_EXPECTED_LARGE_SSHD_CONFIG = {
+    "Port": 22,
+    "PermitRootLogin": False,
+    "PubKeyAuthentication": False,
+    "Subsystem sftp": "/usr/sftp-path",
+    "X11Forwarding": False,
+    "Match": [
+        {
+            "user dummy-user": {
+                "ChrootDirectory": "/home/user/dummy",
+            }
+        },
+        {
+            "address 8.8.8.8/8,9.9.9.9/8": {
+                "PubKeyAuthentication": True,
+                "ClientAliveCountMax": 3
+            }
         }
+    ]
+}
 
-        sshd_inspector = SSHDInspector(
-            sshd_config_path=sshd_config
-        )
 
-        self.assertEqual(sshd_inspector.sshd_config, expected_output)
+class TestIntegrationTest(BaseSshInspectorTest):
+    @classmethod
+    def setUpClass(cls):
+        """
+        Parses the large combined config once for every test of the class.
+        """
+        super().setUpClass()
+        large_sshd_config = write_file(cls.temp_dir, '/etc/ssh/sshd_config.large', _LARGE_SSHD_CONTENT,
+                                       known_dirs=cls._known_dirs)
+        cls.large_sshd_inspector = SSHDInspector(sshd_config_path=large_sshd_config)
+
+    def test_integration_large_combined_sshd_config(self):
+        """
+        Integration test one big sshd config
+        """
+        large_sshd_config = self.large_sshd_inspector.sshd_config
+
+        self.assertCountEqual(large_sshd_config, _EXPECTED_LARGE_SSHD_CONFIG)
+        for key, expected_value in _EXPECTED_LARGE_SSHD_CONFIG.items():
+            with self.subTest(key=key):
+                self.assertEqual(large_sshd_config.get(key), expected_value)
 
     def test_large_compare_to_functionality(self):
         self.maxDiff = None
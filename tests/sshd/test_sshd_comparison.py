@@ -1,96 +1,87 @@
-import os
+import textwrap
 import unittest
-from sysconfig_inspector.sshd import SSHDInspector
 from tests.sshd.test_sshd import BaseSshInspectorTest
 
-print(f"DEBUG_TEST: Effective User ID (euid): {os.geteuid()}")
+
+_CFG_PORT_22 = textwrap.dedent("""\
+    Port 22
+""")
+_CFG_USEDNS_NO = textwrap.dedent("""\
+    UseDNS no
+""")
+_CFG_MATCH_ADDRESS_PUBKEY_YES = textwrap.dedent("""\
+    Match address 8.8.8.8/8,9.9.9.9/8
+    PubKeyAuthentication yes
+""")
+_CFG_MATCH_ADDRESS_PUBKEY_NO = textwrap.dedent("""\
+    Match address 8.8.8.8/8,9.9.9.9/8
+    PubKeyAuthentication no
+""")
+_CFG_MATCH_USER_TESTUSER = textwrap.dedent("""\
+    Match User testuser
+    PermitRootLogin no
+    PasswordAuthentication yes
+""")
+_CFG_PORT_22_EMPTY_MATCH = textwrap.dedent("""\
+    Port 22
+    Match User foo
+""")
+_CFG_EMPTY = ""
+
 # --- TEST COMPARES ---
 class TestSSHDInspectorComparison(BaseSshInspectorTest):
     def test_compare_to_same(self):
         """
         Tests compare_to with basic global SSHD settings
         """
-        actual_config_content = """
-        Port 22
-        """
-        self.create_test_file(
-            '/etc/ssh/sshd_config',
-            contents=actual_config_content
-        )
-
         external_sshd_config = {
             "Port": 22       
         }
 
-        sshd_inspector = SSHDInspector(
-            sshd_config_path=self.sshd_config_path,
-        )
+        sshd_inspector = self.inspect_sshd_config(_CFG_PORT_22)
         comparison_result = sshd_inspector.compare_to(external_sshd_config)
 
-        self.assertEqual(sshd_inspector.matching_config, external_sshd_config)
+        self.assertComparisonEqual(sshd_inspector, external_sshd_config, {}, {})
 
     def test_compare_different_values(self):
-        actual_config_content = """
-        UseDNS no
-        """
-        self.create_test_file(
-            '/etc/ssh/sshd_config',
-            contents=actual_config_content
-        )
-
         target_sshd_config = {
             "LogLevel": "INFO"         
         }
         
-        sshd_inspector = SSHDInspector(
-            sshd_config_path=self.sshd_config_path,
-        )
+        sshd_inspector = self.inspect_sshd_config(_CFG_USEDNS_NO)
         sshd_inspector.compare_to(target_sshd_config)
 
-        self.assertEqual(sshd_inspector.matching_config, {})
-        self.assertEqual(sshd_inspector.missing_from_actual, {
-            "LogLevel": "INFO"
-        })
-        self.assertEqual(sshd_inspector.extra_in_actual, {
-            "UseDNS": False 
-        })
-
-    def test_compare_non_matching_values(self):
-        actual_config_content = """
-        UseDNS no
-        """
-        self.create_test_file(
-            '/etc/ssh/sshd_config',
-            contents=actual_config_content
+        self.assertComparisonEqual(
+            sshd_inspector,
+            matching={},
+            missing={
+                "LogLevel": "INFO"
+            },
+            extra={
+                "UseDNS": False
+            }
         )
 
+    def test_compare_non_matching_values(self):
         target_sshd_config = {
             "UseDNS": True
         }
 
-        sshd_inspector = SSHDInspector(
-            sshd_config_path=self.sshd_config_path,
-        )
+        sshd_inspector = self.inspect_sshd_config(_CFG_USEDNS_NO)
         sshd_inspector.compare_to(target_sshd_config)
 
-        self.assertEqual(sshd_inspector.matching_config, {}) 
-        self.assertEqual(sshd_inspector.missing_from_actual, {
-            "UseDNS": True
-        })
-        self.assertEqual(sshd_inspector.extra_in_actual, {
-            "UseDNS": False 
-        })
-
-    def test_compare_same_match_block(self):
-        sshd_content = """
-            Match address 8.8.8.8/8,9.9.9.9/8
-            PubKeyAuthentication yes
-        """
-        sshd_config = self.create_test_file(
-            '/etc/ssh/sshd_config',
-            contents=sshd_content
+        self.assertComparisonEqual(
+            sshd_inspector,
+            matching={},
+            missing={
+                "UseDNS": True
+            },
+            extra={
+                "UseDNS": False
+            }
         )
 
+    def test_compare_same_match_block(self):
         target_sshd_config = {
             "Match": [
                 {
@@ -102,57 +93,97 @@ class TestSSHDInspectorComparison(BaseSshInspectorTest):
         }
 
 
-        sshd_inspector = SSHDInspector(
-            sshd_config_path=sshd_config
-        )
+        sshd_inspector = self.inspect_sshd_config(_CFG_MATCH_ADDRESS_PUBKEY_YES)
         sshd_inspector.compare_to(target_sshd_config)
 
 
-        self.assertEqual(sshd_inspector.matching_config, target_sshd_config)
-        self.assertEqual(sshd_inspector.missing_from_actual, {})
-        self.assertEqual(sshd_inspector.extra_in_actual, {})
-
-
-    def test_match_only_in_actual_config(self):
-        sshd_content = """
-            Match address 8.8.8.8/8,9.9.9.9/8
-            PubKeyAuthentication no
-        """
-        sshd_config = self.create_test_file(
-            '/etc/ssh/sshd_config',
-            contents=sshd_content
-        )
-
-        target_sshd_config = {}
+        self.assertComparisonEqual(sshd_inspector, target_sshd_config, {}, {})
 
-        sshd_inspector = SSHDInspector(
-            sshd_config_path=sshd_config
-        )
-        sshd_inspector.compare_to(target_sshd_config)
 
+    def test_compare_same_does_not_share_state(self):
+        sshd_inspector = self.inspect_sshd_config(_CFG_MATCH_ADDRESS_PUBKEY_YES)
+        sshd_inspector.compare_to(sshd_inspector.sshd_config)
+        sshd_inspector.matching_config["Match"][0]["address 8.8.8.8/8,9.9.9.9/8"]["PubKeyAuthentication"] = False
 
-        self.assertEqual(sshd_inspector.matching_config, {}) 
-        self.assertEqual(sshd_inspector.missing_from_actual, {})
-        self.assertEqual(sshd_inspector.extra_in_actual, 
-        {
+        self.assertDictEqual(sshd_inspector.sshd_config, {
             "Match": [
                 {
                     "address 8.8.8.8/8,9.9.9.9/8": {
-                        "PubKeyAuthentication": False
+                        "PubKeyAuthentication": True
                     }
                 }
             ]
         })
 
-
-    def test_match_only_in_target_config(self):
-        sshd_content = """
+    def test_compare_same_skips_empty_match_block(self):
+        """
+        An empty Match block is never reported, whatever the other directives are.
         """
-        sshd_config = self.create_test_file(
-            '/etc/ssh/sshd_config',
-            contents=sshd_content
+        sshd_inspector = self.inspect_sshd_config(_CFG_PORT_22_EMPTY_MATCH)
+
+        for target_port, matching, missing, extra in (
+            (22, {"Port": 22}, {}, {}),
+            (2222, {}, {"Port": 2222}, {"Port": 22}),
+        ):
+            with self.subTest(target_port=target_port):
+                sshd_inspector.compare_to({"Port": target_port, "Match": [{"User foo": {}}]})
+
+                self.assertComparisonEqual(sshd_inspector, matching, missing, extra)
+
+    def test_compare_match_block_ignores_criteria_whitespace(self):
+        target_sshd_config = {
+            "Match": [
+                {
+                    "address  8.8.8.8/8,9.9.9.9/8": {
+                        "PubKeyAuthentication": True
+                    }
+                }
+            ],
+            "Port": 22
+        }
+
+        sshd_inspector = self.inspect_sshd_config(_CFG_MATCH_ADDRESS_PUBKEY_YES)
+        sshd_inspector.compare_to(target_sshd_config)
+
+        self.assertComparisonEqual(
+            sshd_inspector,
+            matching={
+                "Match": [
+                    {
+                        "address 8.8.8.8/8,9.9.9.9/8": {
+                            "PubKeyAuthentication": True
+                        }
+                    }
+                ]
+            },
+            missing={"Port": 22},
+            extra={}
         )
 
+    def test_match_only_in_actual_config(self):
+        target_sshd_config = {}
+
+        sshd_inspector = self.inspect_sshd_config(_CFG_MATCH_ADDRESS_PUBKEY_NO)
+        sshd_inspector.compare_to(target_sshd_config)
+
+
+        self.assertComparisonEqual(
+            sshd_inspector,
+            matching={},
+            missing={},
+            extra={
+                "Match": [
+                    {
+                        "address 8.8.8.8/8,9.9.9.9/8": {
+                            "PubKeyAuthentication": False
+                        }
+                    }
+                ]
+            }
+        )
+
+
+    def test_match_only_in_target_config(self):
         target_sshd_config = {
             "Match": [
                 {
@@ -163,26 +194,13 @@ class TestSSHDInspectorComparison(BaseSshInspectorTest):
             ]
         }
 
-        sshd_inspector = SSHDInspector(
-            sshd_config_path=sshd_config
-        )
+        sshd_inspector = self.inspect_sshd_config(_CFG_EMPTY)
         sshd_inspector.compare_to(target_sshd_config)
 
 
-        self.assertEqual(sshd_inspector.matching_config, {}) 
-        self.assertEqual(sshd_inspector.missing_from_actual, target_sshd_config)
-        self.assertEqual(sshd_inspector.extra_in_actual, {})
+        self.assertComparisonEqual(sshd_inspector, {}, target_sshd_config, {})
 
     def test_compare_match_block_with_different_values(self):
-        sshd_content = """
-            Match address 8.8.8.8/8,9.9.9.9/8
-            PubKeyAuthentication no
-        """
-        sshd_config = self.create_test_file(
-            '/etc/ssh/sshd_config',
-            contents=sshd_content
-        )
-
         target_sshd_config = {
             "Match": [
                 {
@@ -193,36 +211,48 @@ class TestSSHDInspectorComparison(BaseSshInspectorTest):
             ]
         }
 
-        sshd_inspector = SSHDInspector(
-            sshd_config_path=sshd_config
-        )
+        sshd_inspector = self.inspect_sshd_config(_CFG_MATCH_ADDRESS_PUBKEY_NO)
         sshd_inspector.compare_to(target_sshd_config)
 
 
-        self.assertEqual(sshd_inspector.matching_config, {}) 
-        self.assertEqual(sshd_inspector.missing_from_actual, target_sshd_config)
-        self.assertEqual(sshd_inspector.extra_in_actual, 
-        {
+        self.assertComparisonEqual(
+            sshd_inspector,
+            matching={},
+            missing=target_sshd_config,
+            extra={
+                "Match": [
+                    {
+                        "address 8.8.8.8/8,9.9.9.9/8": {
+                            "PubKeyAuthentication": False
+                        }
+                    }
+                ]
+            }
+        )
+
+    def test_compare_match_block_partly_matching(self):
+        target_sshd_config = {
             "Match": [
                 {
-                    "address 8.8.8.8/8,9.9.9.9/8": {
-                        "PubKeyAuthentication": False
+                    "User testuser": {
+                        "PermitRootLogin": False,
+                        "PasswordAuthentication": False,
                     }
                 }
             ]
-        })
+        }
 
-    def test_compare_different_match_blocks(self):
-        sshd_content = """
-            Match User testuser
-            PermitRootLogin no
-            PasswordAuthentication yes
-        """
-        sshd_config = self.create_test_file(
-            '/etc/ssh/sshd_config',
-            contents=sshd_content
+        sshd_inspector = self.inspect_sshd_config(_CFG_MATCH_USER_TESTUSER)
+        sshd_inspector.compare_to(target_sshd_config)
+
+        self.assertComparisonEqual(
+            sshd_inspector,
+            matching={"Match": [{"User testuser": {"PermitRootLogin": False}}]},
+            missing={"Match": [{"User testuser": {"PasswordAuthentication": False}}]},
+            extra={"Match": [{"User testuser": {"PasswordAuthentication": True}}]}
         )
 
+    def test_compare_different_match_blocks(self):
         target_sshd_config = {
             "Match": [
                 {
@@ -234,23 +264,23 @@ class TestSSHDInspectorComparison(BaseSshInspectorTest):
         }
 
 
-        sshd_inspector = SSHDInspector(
-            sshd_config_path=sshd_config
-        )
+        sshd_inspector = self.inspect_sshd_config(_CFG_MATCH_USER_TESTUSER)
         sshd_inspector.compare_to(target_sshd_config)
 
 
-        self.assertEqual(sshd_inspector.matching_config, {})
-        self.assertEqual(sshd_inspector.missing_from_actual, target_sshd_config)
         # TODO: answer question: should use sshd_inspector.actual_config instead of long dictionary?
-        self.assertEqual(sshd_inspector.extra_in_actual, 
-        {
-            "Match": [
-                {
-                    "User testuser": {
-                        "PermitRootLogin": False,
-                        "PasswordAuthentication": True,
+        self.assertComparisonEqual(
+            sshd_inspector,
+            matching={},
+            missing=target_sshd_config,
+            extra={
+                "Match": [
+                    {
+                        "User testuser": {
+                            "PermitRootLogin": False,
+                            "PasswordAuthentication": True,
+                        }
                     }
-                }
-            ]
-        })
+                ]
+            }
+        )
@@ -1,18 +1,33 @@
-import os
 import unittest
+from unittest import mock
 from sysconfig_inspector.sshd import SSHDInspector
 from tests.sshd.test_sshd import BaseSshInspectorTest
 
-print(f"DEBUG_TEST: Effective User ID (euid): {os.geteuid()}")
 # --- TEST INCLUDES FUNCTIONALITY ---
 class TestIncludesFunctionality(BaseSshInspectorTest):
+    # Static include fragments, one sshd_config.d subdirectory per scenario
+    INCLUDED_FILES = {
+        '/etc/ssh/sshd_config.d/custom/00-custom.conf': "PubkeyAuthentication no\n",
+        '/etc/ssh/sshd_config.d/match/10-match.conf': "Match User admin\n    X11Forwarding no\n",
+        # Relative to its own directory when used as the main config
+        '/etc/ssh/sshd_config.d/recursive/00-recursive.conf': "Include 00-recursive.conf\nPort 22\n",
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Writes the include fragments once for all tests of the class.
+        """
+        super().setUpClass()
+        cls.included_files = cls._bulk_create(cls.INCLUDED_FILES)
+
     def test_does_not_include_configuration(self):
         """
         Do not include /etc/ssh/sshd_config.d/*.conf
         Just read a normal key-value
         """
         main_config_content = f"""
-            Include {self.included_sshd_dir_path}/*.conf
+            Include {self.included_sshd_dir_path}/custom/*.conf
             PubkeyAuthentication yes
         """
         sshd_config = self.create_test_file(
@@ -20,21 +35,93 @@ class TestIncludesFunctionality(BaseSshInspectorTest):
             contents=main_config_content
         )
 
-        included_file_content = """
-            PubkeyAuthentication no
+        expected_output = {
+            "Include": f"{self.included_sshd_dir_path}/custom/*.conf",
+            "PubkeyAuthentication" : True,
+        }
+
+        sshd_inspector = SSHDInspector(
+            sshd_config_path=sshd_config,
+            follow_includes=False
+        )
+
+        self.assertDictEqual(sshd_inspector.sshd_config, expected_output)
+
+    def test_includes_configuration(self):
+        """
+        Include /etc/ssh/sshd_config.d/*.conf in place.
+        First value wins, so the included value overrides the main config.
+        """
+        main_config_content = f"""
+            Include {self.included_sshd_dir_path}/custom/*.conf
+            PubkeyAuthentication yes
         """
-        additional_test_file = self.create_test_file(
-            '/etc/ssh/sshd_config.d/00-custom.conf',
-            contents=included_file_content
+        sshd_config = self.create_test_file(
+            '/etc/ssh/sshd_config',
+            contents=main_config_content
         )
 
         expected_output = {
-            "Include": f"{self.included_sshd_dir_path}/*.conf",
-            "PubkeyAuthentication" : True,
+            "PubkeyAuthentication" : False,
         }
 
         sshd_inspector = SSHDInspector(
-            sshd_config_path=sshd_config
+            sshd_config_path=sshd_config,
+            follow_includes=True
         )
 
-        self.assertEqual(sshd_inspector.sshd_config, expected_output)
+        self.assertDictEqual(sshd_inspector.sshd_config, expected_output)
+        self.assertEqual(sshd_inspector.config_file_paths,
+                         [sshd_config, self.included_files['/etc/ssh/sshd_config.d/custom/00-custom.conf']])
+
+    def test_includes_relative_pattern_with_match_block(self):
+        """
+        Relative Include patterns are resolved against the sshd_config directory
+        before they are handed to the include resolver.
+        """
+        main_config_content = """
+            Port 22
+            Include sshd_config.d/match/*.conf
+        """
+        sshd_config = self.create_test_file(
+            '/etc/ssh/sshd_config',
+            contents=main_config_content
+        )
+
+        expected_output = {
+            "Port": 22,
+            "Match": [
+                {
+                    "User admin": {
+                        "X11Forwarding": False
+                    }
+                }
+            ]
+        }
+
+        include_resolver = mock.Mock(return_value=[self.included_files['/etc/ssh/sshd_config.d/match/10-match.conf']])
+
+        sshd_inspector = SSHDInspector(
+            sshd_config_path=sshd_config,
+            follow_includes=True,
+            include_resolver=include_resolver
+        )
+
+        self.assertDictEqual(sshd_inspector.sshd_config, expected_output)
+        include_resolver.assert_called_once_with(f"{self.included_sshd_dir_path}/match/*.conf")
+
+    def test_recursive_include_is_limited(self):
+        """
+        A file including itself stops at MAX_INCLUDE_DEPTH and logs an ERROR.
+        """
+        recursive_file = self.included_files['/etc/ssh/sshd_config.d/recursive/00-recursive.conf']
+
+        with self.assertLogs('sysconfig_inspector.sshd', level='ERROR') as cm:
+            sshd_inspector = SSHDInspector(
+                sshd_config_path=recursive_file,
+                follow_includes=True
+            )
+
+        self.assertIn("Include nested too deeply", cm.output[0])
+        self.assertDictEqual(sshd_inspector.sshd_config, {"Port": 22})
+        self.assertEqual(sshd_inspector.config_file_paths, [recursive_file])
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from sysconfig_inspector.file_utils import BoundedCache, read_file_bytes
+from tests._fsutil import RAM_TMP_DIR, write_file
+
+
+class TestReadFileBytes(unittest.TestCase):
+    def setUp(self):
+        self._temp_dir_handle = tempfile.TemporaryDirectory(dir=RAM_TMP_DIR)
+        self.addCleanup(self._temp_dir_handle.cleanup)
+        self.temp_dir = self._temp_dir_handle.name
+
+    def test_read_whole_file(self):
+        file_path = write_file(self.temp_dir, '/etc/security/limits.conf', contents="* soft core 0\n")
+
+        self.assertEqual(read_file_bytes(file_path), b"* soft core 0\n")
+
+    def test_read_file_larger_than_reported_size(self):
+        """
+        Reads to the end even if the file grew after fstat().
+        """
+        file_path = write_file(self.temp_dir, '/etc/security/limits.conf', contents="* soft core 0\n")
+
+        with mock.patch('os.fstat', return_value=os.stat_result((0,) * 10)):
+            self.assertEqual(read_file_bytes(file_path), b"* soft core 0\n")
+
+    def test_missing_file_raises(self):
+        with self.assertRaises(OSError):
+            read_file_bytes(os.path.join(self.temp_dir, 'missing.conf'))
+
+
+class TestBoundedCache(unittest.TestCase):
+    def test_missing_key_returns_none(self):
+        self.assertIsNone(BoundedCache(max_size=1).get("missing"))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = BoundedCache(max_size=2)
+        cache.put("first", 1)
+        cache.put("second", 2)
+        cache.get("first")
+        cache.put("third", 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn("second", cache)
+        self.assertEqual((cache.get("first"), cache.get("third")), (1, 3))
+
+    def test_values_are_not_shared(self):
+        """
+        Neither the stored original nor a returned value can change the cached entry.
+        """
+        cache = BoundedCache(max_size=1)
+        value = {"Match": [{"User admin": {"X11Forwarding": False}}]}
+        cache.put("key", value)
+        value["Match"][0]["User admin"]["X11Forwarding"] = True
+        cache.get("key")["Match"].clear()
+
+        self.assertDictEqual(cache.get("key"), {"Match": [{"User admin": {"X11Forwarding": False}}]})
+
+
+if __name__ == "__main__":
+    unittest.main()
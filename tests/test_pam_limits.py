@@ -2,38 +2,69 @@ import unittest
 import stat
 import tempfile
 import os
-import shutil
 import logging
+from unittest import mock
 from sysconfig_inspector.pam_limits import PamLimits
+from tests._fsutil import RAM_TMP_DIR, write_file
+
+# (case name, files to create); files are expected back in this order
+_CONFIG_FILE_CASES = [
+    ("default", ['/etc/security/limits.conf']),
+    ("subdirectory", ['/etc/security/limits.d/10-test.conf']),
+    ("default and supplementary", ['/etc/security/limits.conf', '/etc/security/limits.d/10-test.conf']),
+]
+
+# Expected parse results, without the "file" key, which depends on the temp directory.
+# The small two-line fixture is written to limits.conf or limits.d; the large one models the limits.conf manpage example
+_EXPECTED_SMALL_FIXTURE_ROWS = (
+    {"domain": "*", "limit_type": "soft", "limit_item": "core", "value": 0},
+    {"domain": "@admin", "limit_type": "hard", "limit_item": "nofile", "value": 10240},
+)
+_EXPECTED_LIMITS_CONF_ROWS = (
+    {"domain": "*", "limit_type": "soft", "limit_item": "core", "value": 0},
+    {"domain": "root", "limit_type": "hard", "limit_item": "core", "value": 100000},
+    {"domain": "*", "limit_type": "hard", "limit_item": "nofile", "value": 512},
+    {"domain": "@student", "limit_type": "hard", "limit_item": "nproc", "value": 20},
+    {"domain": "@faculty", "limit_type": "soft", "limit_item": "nproc", "value": 20},
+    {"domain": "@faculty", "limit_type": "hard", "limit_item": "nproc", "value": 50},
+    {"domain": "ftp", "limit_type": "hard", "limit_item": "nproc", "value": 0},
+    {"domain": "@student", "limit_type": "-", "limit_item": "maxlogins", "value": 4},
+    {"domain": "@student", "limit_type": "-", "limit_item": "nonewprivs", "value": 1},
+    {"domain": ":123", "limit_type": "hard", "limit_item": "cpu", "value": 5000},
+    {"domain": "@500:", "limit_type": "soft", "limit_item": "cpu", "value": 10000},
+    {"domain": "600:700", "limit_type": "hard", "limit_item": "locks", "value": 10},
+)
 
-def create_test_file(base_temp_dir: str, file_relative_path: str, contents: str = ""):
-    """Create a file with content in a temporary directory structure.
-    file_relative_path should be like '/etc/security/limits.conf'
-    """
-    full_path = os.path.join(base_temp_dir, file_relative_path.lstrip(os.sep))
-    
-    os.makedirs(os.path.dirname(full_path), exist_ok=True)
-    
-    with open(full_path, 'w', encoding='utf-8') as f:
-        f.write(contents)
-    return full_path 
 
 class BasePamLimitsTest(unittest.TestCase):
-    """Base class for tests that need a temporary filesystem."""
-    def setUp(self):
-        self.temp_dir = tempfile.mkdtemp()
+    """
+    Base class for tests that need a temporary filesystem.
+    The /etc/security skeleton is created once per class.
+    Files written by a test are removed after it.
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls._temp_dir_handle = tempfile.TemporaryDirectory(dir=RAM_TMP_DIR)
+        cls.addClassCleanup(cls._temp_dir_handle.cleanup)
+        cls.temp_dir = cls._temp_dir_handle.name
         
-        self.temp_limits_conf_path = os.path.join(self.temp_dir, 'etc', 'security', 'limits.conf')
-        self.temp_limits_d_dir = os.path.join(self.temp_dir, 'etc', 'security', 'limits.d')
-        self.temp_limits_d_path_pattern = os.path.join(self.temp_limits_d_dir, '*.conf')
+        cls.temp_limits_conf_path = os.path.join(cls.temp_dir, 'etc', 'security', 'limits.conf')
+        cls.temp_limits_d_dir = os.path.join(cls.temp_dir, 'etc', 'security', 'limits.d')
+        cls.temp_limits_d_path_pattern = os.path.join(cls.temp_limits_d_dir, '*.conf')
 
         # Create /etc/security and /etc/security/limits.d paths
-        os.makedirs(os.path.dirname(self.temp_limits_conf_path), exist_ok=True) 
-        os.makedirs(self.temp_limits_d_dir, exist_ok=True)
+        os.makedirs(cls.temp_limits_d_dir)
 
-    def tearDown(self):
-        """Clean up the temporary directory after each test"""
-        shutil.rmtree(self.temp_dir)
+    def setUp(self):
+        self.addCleanup(self._remove_test_files)
+
+    def _remove_test_files(self):
+        """Remove all files from /etc/security and /etc/security/limits.d"""
+        for directory in (os.path.dirname(self.temp_limits_conf_path), self.temp_limits_d_dir):
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_file(follow_symlinks=False):
+                        os.unlink(entry.path)
 
 
 class TestPamLimits(BasePamLimitsTest):
@@ -42,45 +73,45 @@ class TestPamLimits(BasePamLimitsTest):
         self.assertIsInstance(pam_limits, PamLimits)
 
 
-    def test_find_default_config_file(self):
-        conf_file_path = create_test_file(self.temp_dir, '/etc/security/limits.conf')
+    def test_find_config_file_paths(self):
+        for name, relative_paths in _CONFIG_FILE_CASES:
+            with self.subTest(name=name):
+                self._remove_test_files()
+                expected_output = [write_file(self.temp_dir, path) for path in relative_paths]
 
-        pam_limits = PamLimits(limits_conf_path=self.temp_limits_conf_path,
-                               limits_d_path=self.temp_limits_d_path_pattern)
-        files = pam_limits.config_file_paths
+                pam_limits = PamLimits(limits_conf_path=self.temp_limits_conf_path,
+                                       limits_d_path=self.temp_limits_d_path_pattern)
+                files = pam_limits.config_file_paths
 
-        self.assertEqual(files, [conf_file_path])
+                self.assertEqual(files, expected_output)
 
 
-    def test_find_config_file_paths_in_subdirectory(self):
-        d_file_path = create_test_file(self.temp_dir, '/etc/security/limits.d/10-test.conf')
+    def test_supplementary_config_files_are_sorted(self):
+        late_file_path = write_file(self.temp_dir, '/etc/security/limits.d/90-late.conf')
+        early_file_path = write_file(self.temp_dir, '/etc/security/limits.d/10-early.conf')
 
         pam_limits = PamLimits(limits_conf_path=self.temp_limits_conf_path,
                                limits_d_path=self.temp_limits_d_path_pattern)
-        files = pam_limits.config_file_paths
 
-        self.assertEqual(files, [d_file_path])
+        self.assertEqual(pam_limits.config_file_paths, [early_file_path, late_file_path])
 
 
-    def test_default_and_supplementary_config_files_exist_combined(self):
-        conf_file_path = create_test_file(self.temp_dir, '/etc/security/limits.conf')
-        d_file_path = create_test_file(self.temp_dir, '/etc/security/limits.d/10-test.conf')
+    def test_empty_supplementary_path_skips_directory_scan(self):
+        conf_file_path = write_file(self.temp_dir, '/etc/security/limits.conf')
+        write_file(self.temp_dir, '/etc/security/limits.d/10-test.conf')
 
-        pam_limits = PamLimits(limits_conf_path=self.temp_limits_conf_path,
-                               limits_d_path=self.temp_limits_d_path_pattern)
-        files = pam_limits.config_file_paths
+        with mock.patch('glob.iglob') as mock_glob:
+            pam_limits = PamLimits(limits_conf_path=self.temp_limits_conf_path,
+                                   limits_d_path="")
 
-        expected_output = [
-            conf_file_path,
-            d_file_path
-        ]
-        self.assertEqual(files, expected_output)
+        mock_glob.assert_not_called()
+        self.assertEqual(pam_limits.config_file_paths, [conf_file_path])
 
 
 class TestPamLimitsParser(BasePamLimitsTest):
     """Test Parser functionality of class"""
     def test_read_limits_config(self):
-        limits_config = create_test_file(self.temp_dir, '/etc/security/limits.conf', contents="""
+        limits_config = write_file(self.temp_dir, '/etc/security/limits.conf', contents="""
             # Comment line
             * soft core 0
             @admin hard nofile 10240
@@ -88,35 +119,19 @@ class TestPamLimitsParser(BasePamLimitsTest):
 
         pam_limits = PamLimits(limits_conf_path=limits_config,
                                limits_d_path=self.temp_limits_d_path_pattern)
-        pam_limits.actual_limits_config
 
-        expected = [
-            {
-                "file": limits_config,
-                "domain": "*",
-                "limit_type": "soft",
-                "limit_item": "core",
-                "value": 0,
-            },
-            {
-                "file": limits_config,
-                "domain": "@admin",
-                "limit_type": "hard",
-                "limit_item": "nofile",
-                "value": 10240,
-            }
-        ]
-        self.assertEqual(pam_limits.actual_limits_config, expected)
+        expected = [{"file": limits_config, **row} for row in _EXPECTED_SMALL_FIXTURE_ROWS]
+        self.assertListEqual(pam_limits.actual_limits_config, expected)
 
     def test_read_multiple_configs(self):
-        supplementary_limits_config = create_test_file(self.temp_dir,
+        supplementary_limits_config = write_file(self.temp_dir,
             '/etc/security/limits.d/10-test.conf', 
             contents="""
                 # Comment line
                 * soft core 0
                 @admin hard nofile 10240
             """)
-        limits_config = create_test_file(self.temp_dir,
+        limits_config = write_file(self.temp_dir,
             '/etc/security/limits.conf', 
             contents="""
                 *               soft    core            0
@@ -137,113 +152,35 @@ class TestPamLimitsParser(BasePamLimitsTest):
                                limits_d_path=self.temp_limits_d_path_pattern)
         actual_config = pam_limits.actual_limits_config
 
-        expected_output = [
-            {
-                "file": limits_config,
-                "domain": "*",
-                "limit_type": "soft",
-                "limit_item": "core",
-                "value": 0
-            },
-            {
-                "file": limits_config,
-                "domain": "root",
-                "limit_type": "hard",
-                "limit_item": "core",
-                "value": 100000
-            },
-            {
-                "file": limits_config,
-                "domain": "*",
-                "limit_type": "hard",
-                "limit_item": "nofile",
-                "value": 512
-            },
-            {
-                "file": limits_config,
-                "domain": "@student",
-                "limit_type": "hard",
-                "limit_item": "nproc",
-                "value": 20
-            },
-            {
-                "file": limits_config,
-                "domain": "@faculty",
-                "limit_type": "soft",
-                "limit_item": "nproc",
-                "value": 20
-            },
-            {
-                "file": limits_config,
-                "domain": "@faculty",
-                "limit_type": "hard",
-                "limit_item": "nproc",
-                "value": 50
-            },
-            {
-                "file": limits_config,
-                "domain": "ftp",
-                "limit_type": "hard",
-                "limit_item": "nproc",
-                "value": 0
-            },
-            {
-                "file": limits_config,
-                "domain": "@student",
-                "limit_type": "-",
-                "limit_item": "maxlogins",
-                "value": 4
-            },
-            {
-                "file": limits_config,
-                "domain": "@student",
-                "limit_type": "-",
-                "limit_item": "nonewprivs",
-                "value": 1
-            },
-            {
-                "file": limits_config,
-                "domain": ":123",
-                "limit_type": "hard",
-                "limit_item": "cpu",
-                "value": 5000
-            },
-            {
-                "file": limits_config,
-                "domain": "@500:",
-                "limit_type": "soft",
-                "limit_item": "cpu",
-                "value": 10000
-            },
-            {
-                "file": limits_config,
-                "domain": "600:700",
-                "limit_type": "hard",
-                "limit_item": "locks",
-                "value": 10
-            },
-            {
-                "file": supplementary_limits_config,
-                "domain": "*",
-                "limit_type": "soft",
-                "limit_item": "core",
-                "value": 0,
-            },
-            {
-                "file": supplementary_limits_config,
-                "domain": "@admin",
-                "limit_type": "hard",
-                "limit_item": "nofile",
-                "value": 10240,
-            }
-        ]
+        expected_output = (
+            [{"file": limits_config, **row} for row in _EXPECTED_LIMITS_CONF_ROWS]
+            + [{"file": supplementary_limits_config, **row} for row in _EXPECTED_SMALL_FIXTURE_ROWS]
+        )
+
+        self.assertListEqual(actual_config, expected_output)
+
 
-        self.assertEqual(actual_config, expected_output)
 
 
 class TestLimitsComparator(BasePamLimitsTest):
+    def test_identical_configs_do_not_share_state(self):
+        """
+        A second instance for an unchanged file is served from the parse cache.
+        Changing an entry of the first instance must not leak into it.
+        """
+        limits_config = write_file(self.temp_dir, '/etc/security/limits.conf', contents="* soft core 0\n")
+
+        first_pam_limits = PamLimits(limits_conf_path=limits_config,
+                                     limits_d_path=self.temp_limits_d_path_pattern)
+        second_pam_limits = PamLimits(limits_conf_path=limits_config,
+                                      limits_d_path=self.temp_limits_d_path_pattern)
+        first_pam_limits.actual_limits_config[0]["value"] = 1
+
+        self.assertListEqual(second_pam_limits.actual_limits_config,
+                             [{"file": limits_config, **_EXPECTED_SMALL_FIXTURE_ROWS[0]}])
+
     def test_limits_compare_to(self):
-        limits_config = create_test_file(self.temp_dir,
+        limits_config = write_file(self.temp_dir,
             '/etc/security/limits.conf', 
             contents="""
                 # Comment line
@@ -272,7 +209,24 @@ class TestLimitsComparator(BasePamLimitsTest):
                                limits_d_path=self.temp_limits_d_path_pattern)
         pam_limits.compare_to(external_pam_limits)
 
-        self.assertEqual(pam_limits.matching_limits, external_pam_limits)
+        self.assertListEqual(pam_limits.matching_limits, external_pam_limits)
+
+
+    def test_limits_compare_against_on_init(self):
+        limits_config = write_file(self.temp_dir,
+            '/etc/security/limits.conf', 
+            contents="* soft core 0\n")
+        target_limits = [
+            {"file": limits_config, **row} for row in _EXPECTED_SMALL_FIXTURE_ROWS
+        ]
+
+        pam_limits = PamLimits(limits_conf_path=self.temp_limits_conf_path,
+                               limits_d_path=self.temp_limits_d_path_pattern,
+                               compare_against=target_limits)
+
+        self.assertListEqual(pam_limits.matching_limits, target_limits[:1])
+        self.assertListEqual(pam_limits.missing_from_actual, target_limits[1:])
+        self.assertEqual(pam_limits.extra_in_actual, [])
 
 
     def test_malformed_lines_return_empty_list(self):
@@ -282,7 +236,7 @@ class TestLimitsComparator(BasePamLimitsTest):
         limits_content = """
             user soft core
         """
-        limits_file_path = create_test_file(self.temp_dir, '/etc/security/limits.conf', contents=limits_content)
+        limits_file_path = write_file(self.temp_dir, '/etc/security/limits.conf', contents=limits_content)
 
         pam_limits = PamLimits(limits_conf_path=limits_file_path,
                                limits_d_path=self.temp_limits_d_path_pattern)
@@ -297,7 +251,7 @@ class TestLimitsComparator(BasePamLimitsTest):
         limits_content = """
             user soft core
         """
-        limits_file_path = create_test_file(self.temp_dir, '/etc/security/limits.conf', contents=limits_content)
+        limits_file_path = write_file(self.temp_dir, '/etc/security/limits.conf', contents=limits_content)
 
         with self.assertLogs('sysconfig_inspector.pam_limits', level='WARNING') as cm:
             pam_limits = PamLimits(limits_conf_path=limits_file_path,
@@ -316,8 +270,12 @@ class TestLimitsComparator(BasePamLimitsTest):
         """
         limits_content = """
             @users soft maxlogins unlimited
+            @users hard nofile -1
+            @users hard nproc -
+            @users soft nproc +5
+            @users soft nofile 1_000
         """
-        limits_file_path = create_test_file(
+        limits_file_path = write_file(
             self.temp_dir,
             '/etc/security/limits.conf',
             contents=limits_content
@@ -336,9 +294,37 @@ class TestLimitsComparator(BasePamLimitsTest):
                 "limit_item": "maxlogins",
                 "value": "unlimited", 
             },
+            {
+                "file": limits_file_path,
+                "domain": "@users",
+                "limit_type": "hard",
+                "limit_item": "nofile",
+                "value": -1,
+            },
+            {
+                "file": limits_file_path,
+                "domain": "@users",
+                "limit_type": "hard",
+                "limit_item": "nproc",
+                "value": "-",
+            },
+            {
+                "file": limits_file_path,
+                "domain": "@users",
+                "limit_type": "soft",
+                "limit_item": "nproc",
+                "value": 5,
+            },
+            {
+                "file": limits_file_path,
+                "domain": "@users",
+                "limit_type": "soft",
+                "limit_item": "nofile",
+                "value": "1_000",
+            },
         ]
 
-        self.assertEqual(pam_limits.actual_limits_config, expected_parsed_limits)
+        self.assertListEqual(pam_limits.actual_limits_config, expected_parsed_limits)
 
 
 if __name__ == "__main__":